@@ -1,286 +1,727 @@
-import streamlit as st
-import gspread
-from google.oauth2.service_account import Credentials
-import pandas as pd
-from datetime import date
-
-
-
-
-# Google Sheets setup
-SCOPE = ["https://www.googleapis.com/auth/spreadsheets", "https://www.googleapis.com/auth/drive"]
-
-@st.cache_resource
-def init_connection():
-    credentials = Credentials.from_service_account_info(
-        st.secrets["gcp_service_account"],
-        scopes=SCOPE
-    )
-    client = gspread.authorize(credentials)
-    return client
-
-# Initialize connection
-clients = init_connection()
-client1 = clients.open("twi_users").sheet1
-client2 = clients.open("twi_dataset").sheet1
-
-
-
-# -----------------------------
-# Caching Helpers (to avoid hitting API quota)
-# -----------------------------
-@st.cache_data(ttl=60)  # cache results for 60 seconds
-def load_users():
-    return client1.get_all_records()
-
-@st.cache_data(ttl=60)
-def load_dataset():
-    return client2.get_all_records()
-
-
-# Session state
-if 'logged_in' not in st.session_state:
-    st.session_state.logged_in = False
-if 'username' not in st.session_state:
-    st.session_state.username = ""
-if 'is_admin' not in st.session_state:
-    st.session_state.is_admin = False
-if 'uploaded_excel' not in st.session_state:   # 🔹 track uploaded excel
-    st.session_state.uploaded_excel = None
-
-st.title("📖 Twi Dataset Hub")
-
-# ----------------- ADMIN DASHBOARD -----------------
-if st.session_state.logged_in and st.session_state.is_admin:
-    st.header("🛠️ Admin Dashboard")
-
-    if st.button("Logout"):
-        st.session_state.logged_in = False
-        st.session_state.username = ""
-        st.session_state.is_admin = False
-        st.rerun()
-
-    users = load_users()
-    dataset = load_dataset()
-
-    st.subheader("📖 Twi-English Dataset")
-    df = pd.DataFrame(dataset)
-    st.dataframe(df)
-
-    st.subheader("👥 All Users")
-    dff = pd.DataFrame(users)
-    st.dataframe(dff)
-
-    st.subheader("📊 Dataset Statistics")
-    total_entries = len(dataset)
-    total_users = len(users)
-
-    col1, col2, col3 = st.columns(3)
-    col1.metric("Total Entries", total_entries)
-    col2.metric("Total Users", total_users)
-    col3.metric("Avg Entries/User", f"{total_entries / max(total_users-1,1):.1f}")
-
-    if not df.empty and "username" in df.columns:
-        st.subheader("📌 User Contributions")
-        username_counts = df["username"].value_counts().reset_index()
-        username_counts.columns = ["Username", "Entries Count"]
-        st.dataframe(username_counts)
-        st.bar_chart(username_counts.set_index("Username"))
-
-    # User & contribution deletion
-    st.subheader("🗑️ Manage Users")
-    if not dff.empty and "username" in dff.columns:
-        user_to_delete = st.selectbox("Select user to delete", options=dff["username"].tolist())
-        if st.button("Delete User"):
-            for i, user in enumerate(client1.get_all_records(), start=2):
-                if user["username"] == user_to_delete:
-                    client1.delete_rows(i)
-                    st.cache_data.clear()  # 🔄 clear cache after mutation
-                    st.success(f"Deleted user '{user_to_delete}'")
-                    st.rerun()
-
-    st.subheader("🗑️ Manage Contributions")
-    if not df.empty and "username" in df.columns:
-        contrib_user = st.selectbox("Select user to delete contributions", options=df["username"].unique().tolist())
-        if st.button("Delete Contributions"):
-            dataset_rows = client2.get_all_records()
-            rows_to_delete = [i for i, row in enumerate(dataset_rows, start=2) if row["username"] == contrib_user]
-            for row_index in reversed(rows_to_delete):
-                client2.delete_rows(row_index)
-            st.cache_data.clear()  # 🔄 clear cache after mutation
-            st.success(f"All contributions from '{contrib_user}' deleted")
-            st.rerun()
-
-# ----------------- USER DASHBOARD -----------------
-elif st.session_state.logged_in and not st.session_state.is_admin:
-    dataset = load_dataset()
-    df = pd.DataFrame(dataset)
-
-    # 🔹 Count current user's entries
-    if not df.empty and "username" in df.columns:
-        user_entries = df[df["username"] == st.session_state.username]
-        entry_count = len(user_entries)
-    else:
-        entry_count = 0
-
-    # Header with stats + logout on SAME LINE
-    col1, col2 = st.columns([3,1])
-    with col1:
-        st.subheader(f"👋 Welcome, {st.session_state.username} 🤗 | Entries = {entry_count}")
-    with col2:
-        if st.button("Logout"):
-            st.session_state.logged_in = False
-            st.session_state.username = ""
-            st.session_state.is_admin = False
-            st.rerun()
-
-    # Tabs for entry methods
-    st.subheader("📝 Data Collection Form")
-    tab_manual, tab_excel = st.tabs(["✍️ Manual Entry", "📂 Upload Excel"])
-
-    with tab_manual:
-        with st.form("data_form", clear_on_submit=True):
-            select_date = st.date_input("Date", date.today())
-            twi = st.text_area("Enter Twi Sentence (10–15 words preferred)", height=100, placeholder="Type the Twi sentence here...")
-            english = st.text_area("Enter English Translation", height=100, placeholder="Type the English translation here...")
-
-            submitted = st.form_submit_button("Submit Data", use_container_width=True)
-            if submitted:
-                if not twi.strip() or not english.strip():
-                    st.error("❌ Please fill in both fields!")
-                else:
-                    duplicate_found = any(
-                        str(row.get('twi','')).strip().lower() == twi.strip().lower() and
-                        str(row.get('english','')).strip().lower() == english.strip().lower()
-                        for row in dataset
-                    )
-                    if duplicate_found:
-                        st.warning("⚠️ This translation pair already exists in the dataset.")
-                    else:
-                        client2.append_row([
-                            select_date.strftime("%Y-%m-%d"),
-                            twi.strip(),
-                            english.strip(),
-                            st.session_state.username
-                        ])
-                        st.cache_data.clear()  # 🔄 clear cache after mutation
-                        st.success("✅ Entry submitted successfully!")
-                        st.balloons()
-                        st.rerun()
-
-    with tab_excel:
-        st.session_state.uploaded_excel = st.file_uploader("Upload Excel File (.xlsx)", type=["xlsx"])  # 🔹 track file
-        if st.session_state.uploaded_excel:
-            try:
-                excel_df = pd.read_excel(st.session_state.uploaded_excel)
-    
-                # 🔹 Force first col = twi, second col = english (ignore column names)
-                if excel_df.shape[1] < 2:
-                    st.error("❌ Excel file must contain at least two columns (Twi and English).")
-                else:
-                    excel_df = excel_df.iloc[:, :2]  # Take only first two columns
-                    excel_df.columns = ["twi", "english"]  # Rename to standard
-    
-                    st.write("✅ Preview of uploaded file (first two columns as Twi & English):")
-                    st.dataframe(excel_df.head())
-    
-                    if st.button("Insert All Rows into Google Sheet"):
-                        today_str = date.today().strftime("%Y-%m-%d")
-                        rows_to_add = []
-                        duplicates_skipped = 0
-    
-                        for _, row in excel_df.iterrows():
-                            twi_text = str(row["twi"]).strip()
-                            eng_text = str(row["english"]).strip()
-                            if not twi_text or not eng_text:
-                                continue
-    
-                            # Check duplication against existing dataset
-                            duplicate_found = any(
-                                str(r.get('twi','')).strip().lower() == twi_text.lower() and
-                                str(r.get('english','')).strip().lower() == eng_text.lower()
-                                for r in dataset
-                            )
-    
-                            if duplicate_found:
-                                duplicates_skipped += 1
-                                continue
-                            rows_to_add.append([today_str, twi_text, eng_text, st.session_state.username])
-    
-                        if rows_to_add:
-                            client2.append_rows(rows_to_add)
-                            st.cache_data.clear()  # 🔄 clear cache after mutation
-                            st.session_state.uploaded_excel = None  # 🔹 clear file so preview disappears
-                            st.success(f"🎉 Inserted {len(rows_to_add)} new rows! 🚫 Skipped {duplicates_skipped} duplicates.")
-                            st.rerun()
-                        else:
-                            st.warning("⚠️The entries already exist.")
-            except Exception as e:
-                st.error(f"❌ Error reading Excel file: {e}")
-
-# ----------------- LOGIN / REGISTER -----------------
-else:
-    tab1, tab2 = st.tabs(["🔑 Login", "📝 Register"])
-
-    with tab2:
-        st.subheader("Create New Account")
-        with st.form("register_form", clear_on_submit=True):
-            users = load_users()
-            name = st.text_input("Full Name", placeholder="Enter Full Name")
-            username = st.text_input("Username/Nickname", placeholder= "Enter Username/Nickname")
-            password = st.text_input("Password", type="password", placeholder="Enter Password")
-            repassword = st.text_input("Repeat Password", type="password", placeholder="Repeat Password")
-            momo_contact= st.text_input("Payment Phone Number", placeholder= "Enter Phone Number for Cash Transfer")
-            momo_contact_1= st.text_input("Network Provider of Payment Phone Number", placeholder= "Enter the Network provider (Telecel Cash/MoMo/AirtelTigo Cash)")
-            momo_name=st.text_input("Account Name", placeholder= "Enter Account Name of the Payment Phone Number")
-            call_contact= st.text_input("Call Contact", placeholder= "Enter Call Contact")
-            email= st.text_input("Email", placeholder= "Enter Email")
-
-            if st.form_submit_button("Register"):
-                if not name or not username or not password:
-                    st.error("❌ Please fill all fields")
-                elif password != repassword:
-                    st.error("❌ Passwords do not match")
-                elif len(password) < 4:
-                    st.error("❌ Password must be at least 4 characters")
-                elif any(str(user.get("username","")).lower() == username.lower() for user in users):
-                    st.error("❌ Username already exists")
-                else:
-                    client1.append_row([name.strip(), momo_contact.strip(), call_contact.strip(), username.strip(), password.strip(), email.strip(), momo_name.strip(), momo_contact_1.strip()])
-                    st.cache_data.clear()  # 🔄 clear cache after mutation
-                    st.success("🎉 Registration successful! Please login.")
-
-    with tab1:
-        st.subheader("Login to Your Account")
-        with st.form("login_form"):
-            users = load_users()
-            username_in = st.text_input("Username/Nickname", placeholder="Enter Username/Nickname")
-            password_in = st.text_input("Password", type="password", placeholder="Enter Password")
-
-            if st.form_submit_button("Login"):
-                username_in = username_in.strip().lower()
-                password_in = password_in.strip()
-
-                if not username_in or not password_in:
-                    st.error("❌ Enter both username and password")
-                elif username_in == "admin" and password_in == "1345":
-                    st.session_state.logged_in = True
-                    st.session_state.username = "admin"
-                    st.session_state.is_admin = True
-                    st.rerun()
-                else:
-                    found = False
-                    for user in users:
-                        if str(user.get("username","")).lower() == username_in and str(user.get("password","")) == password_in:
-                            found = True
-                            st.session_state.logged_in = True
-                            st.session_state.username = str(user.get("username",""))
-                            st.session_state.is_admin = False
-                            st.rerun()
-                    if not found:
-                        st.error("❌ Wrong login details")
-
-
-
-
-
+import hashlib
+import hmac
+import os
+import random
+import re
+import threading
+import time
+import zlib
+
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor
+
+import streamlit as st
+import gspread
+from google.oauth2.service_account import Credentials
+import pandas as pd
+from datetime import date
+
+
+
+
+# Google Sheets setup
+SCOPE = ["https://www.googleapis.com/auth/spreadsheets", "https://www.googleapis.com/auth/drive"]
+
+# 1-based column index of "username" in both sheets
+# users sheet: name, momo_contact, call_contact, username, ...
+# dataset sheet: date, twi, english, username
+USERNAME_COL = 4
+
+# 1-based index of the "deleted" tombstone column in each sheet (first
+# column after the data). Deletions set a flag there instead of removing
+# the row structurally; reads filter flagged rows out.
+USERS_DELETED_COL = 9
+DATASET_DELETED_COL = 5
+
+# Max rows per append_rows request for Excel uploads
+UPLOAD_CHUNK_ROWS = 500
+
+@st.cache_resource
+def init_connection():
+    credentials = Credentials.from_service_account_info(
+        st.secrets["gcp_service_account"],
+        scopes=SCOPE
+    )
+    client = gspread.authorize(credentials)
+    return client
+
+# Initialize connection
+@st.cache_resource
+def get_worksheets():
+    # The sheets live in separate spreadsheets, so each open() is a Drive
+    # lookup + metadata fetch; cache the handles so that cost is paid once
+    clients = init_connection()
+    users_ss = clients.open("twi_users")
+    dataset_ss = clients.open("twi_dataset")
+    return users_ss.sheet1, users_ss, dataset_ss, dataset_ss.sheet1
+
+client1, users_spreadsheet, dataset_spreadsheet, client2 = get_worksheets()
+
+
+
+class TokenBucket:
+    # Minimal token bucket: bursts up to capacity pass immediately,
+    # sustained traffic is spread at `rate` tokens/second
+    def __init__(self, rate, capacity):
+        self.rate = rate
+        self.capacity = capacity
+        self.tokens = capacity
+        self.updated = time.monotonic()
+        self.lock = threading.Lock()
+
+    def acquire(self):
+        while True:
+            with self.lock:
+                now = time.monotonic()
+                self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+                self.updated = now
+                if self.tokens >= 1:
+                    self.tokens -= 1
+                    return
+                wait = (1 - self.tokens) / self.rate
+            time.sleep(wait)
+
+
+@st.cache_resource
+def write_bucket():
+    # Shared across all sessions; sized under the 60 writes/min/user quota
+    return TokenBucket(rate=55 / 60, capacity=10)
+
+
+def sheet_write(fn, *args, **kwargs):
+    # Every mutation takes a token first so bursts of submits from many
+    # sessions queue instead of tripping 429s
+    write_bucket().acquire()
+    return call_with_backoff(fn, *args, **kwargs)
+
+
+def call_with_backoff(fn, *args, **kwargs):
+    # Retry transient Sheets API failures (quota 429s, 5xx) with
+    # exponential backoff + jitter instead of surfacing them to the user;
+    # honors the server's Retry-After hint when it sends one
+    for attempt in range(5):
+        try:
+            return fn(*args, **kwargs)
+        except gspread.exceptions.APIError as e:
+            status = getattr(e.response, "status_code", None)
+            if status not in (429, 500, 503) or attempt == 4:
+                raise
+            retry_after = e.response.headers.get("Retry-After")
+            if retry_after:
+                delay = float(retry_after)
+            else:
+                delay = 2 ** attempt + random.random()
+            time.sleep(delay)
+
+
+# -----------------------------
+# Caching Helpers (to avoid hitting API quota)
+# -----------------------------
+def _values_to_df(values):
+    # One values.get returns a list of lists; build the DataFrame straight
+    # from it instead of paying gspread's per-row dict construction
+    if not values:
+        return pd.DataFrame()
+    df = pd.DataFrame(values[1:], columns=values[0])
+    # Hide tombstoned rows (see the delete handlers)
+    if "deleted" in df.columns:
+        df = df[df["deleted"] != "1"].drop(columns=["deleted"])
+    return df
+
+
+def _rows_matching(values, col, target):
+    # 1-based sheet rows whose column equals target, straight from a cached
+    # raw grid — the grid keeps tombstoned rows, so positions match the
+    # sheet (unlike the filtered DataFrames). Skips already-deleted rows.
+    header = values[0] if values else []
+    deleted_idx = header.index("deleted") if "deleted" in header else None
+    target = target.strip().casefold()
+    rows = []
+    for i, row in enumerate(values[1:], start=2):
+        if deleted_idx is not None and deleted_idx < len(row) and row[deleted_idx] == "1":
+            continue
+        if col < len(row) and row[col].strip().casefold() == target:
+            rows.append(i)
+    return rows
+
+
+def users_row_for(username):
+    rows = _rows_matching(users_values(), USERNAME_COL - 1, username)
+    return rows[0] if rows else None
+
+
+def dataset_rows_for(username):
+    return _rows_matching(dataset_values(), USERNAME_COL - 1, username)
+
+
+def tombstone_updates(rows, deleted_col):
+    # Value-range updates that flag the given 1-based rows as deleted,
+    # plus the header cell so the column is always labelled; contiguous
+    # rows collapse into one range write
+    a1 = gspread.utils.rowcol_to_a1
+    updates = [{"range": a1(1, deleted_col), "values": [["deleted"]]}]
+    for start, end in coalesce_rows(sorted(rows)):
+        updates.append({
+            "range": f"{a1(start, deleted_col)}:{a1(end, deleted_col)}",
+            "values": [["1"]] * (end - start + 1),
+        })
+    return updates
+
+@st.cache_data(ttl=15, show_spinner=False)
+def users_mtime():
+    # One tiny Drive metadata GET; drives invalidation of the full read.
+    # get_lastUpdateTime() fetches fresh metadata every call — the
+    # lastUpdateTime property only reflects initialisation time
+    return call_with_backoff(users_spreadsheet.get_lastUpdateTime)
+
+@st.cache_data(ttl=15, show_spinner=False)
+def dataset_mtime():
+    return call_with_backoff(dataset_spreadsheet.get_lastUpdateTime)
+
+@st.cache_resource(ttl=3600)
+def _users_values(mtime):
+    # Keyed on the sheet's modifiedTime: the grid is only re-downloaded
+    # when the sheet actually changed, not on every TTL expiry
+    return call_with_backoff(client1.get_all_values)
+
+@st.cache_resource(ttl=3600)
+def _dataset_values(mtime):
+    return call_with_backoff(client2.get_all_values)
+
+@st.cache_resource
+def _last_good_values():
+    # Last grid that loaded successfully, per sheet, plus the set of
+    # sheets currently served stale — the stale-on-error fallback below
+    # draws on this when the API is down
+    return {"grids": {}, "stale": set()}
+
+def _values_with_fallback(key, mtime_fn, values_fn):
+    state = _last_good_values()
+    try:
+        values = values_fn(mtime_fn())
+    except gspread.exceptions.APIError:
+        if key not in state["grids"]:
+            raise
+        # 🔹 Better a stale dashboard than a blank one: serve the last
+        # good snapshot. No st.warning here — under warm_admin_caches
+        # this runs in a worker thread with no ScriptRunContext and the
+        # banner would be dropped; record the flag instead and let
+        # stale_data_warning() emit it from the script thread
+        state["stale"].add(key)
+        return state["grids"][key]
+    state["grids"][key] = values
+    state["stale"].discard(key)
+    return values
+
+def stale_data_warning():
+    # Emit the stale-data banner from the main script thread, after the
+    # loaders (possibly in worker threads) have run
+    if _last_good_values()["stale"]:
+        st.warning("⚠️ Google Sheets is unavailable — showing cached data")
+
+def users_values():
+    return _values_with_fallback("users", users_mtime, _users_values)
+
+def dataset_values():
+    return _values_with_fallback("dataset", dataset_mtime, _dataset_values)
+
+# cache_resource, not cache_data: returns the one shared frame instead of
+# pickling a deep copy per call — callers must treat it as read-only
+@st.cache_resource(ttl=60)
+def load_users_df():
+    return _values_to_df(users_values())
+
+@st.cache_data(ttl=60)
+def load_user_index():
+    # Username -> record map so login and duplicate checks are O(1)
+    df = load_users_df()
+    if df.empty or "username" not in df.columns:
+        return {}
+    return {
+        str(u.get("username", "")).lower(): u
+        for u in df.to_dict("records")
+    }
+
+@st.cache_resource(ttl=60)
+def load_dataset():
+    # Cache the DataFrame itself so it is built once per TTL window,
+    # not on every rerun
+    return _values_to_df(dataset_values())
+
+@st.cache_data(ttl=60)
+def load_dataset_dupkeys():
+    df = load_dataset()
+    if df.empty or "twi" not in df.columns or "english" not in df.columns:
+        return frozenset()
+    # Normalize both columns in vectorized passes, then zip into keys
+    return frozenset(zip(
+        df["twi"].astype(str).str.strip().str.casefold(),
+        df["english"].astype(str).str.strip().str.casefold(),
+    ))
+
+@st.cache_data(ttl=60)
+def user_name_list():
+    # Selectbox options only change when the users sheet does
+    df = load_users_df()
+    if "username" not in df.columns:
+        return ()
+    return tuple(df["username"].astype(str))
+
+@st.cache_data(ttl=60)
+def contributor_list():
+    df = load_dataset()
+    if "username" not in df.columns:
+        return ()
+    return tuple(sorted(df["username"].astype(str).unique()))
+
+@st.cache_data(ttl=60)
+def contribution_counter():
+    # Entries per (casefolded) username; one pass, cached with the dataset
+    df = load_dataset()
+    if df.empty or "username" not in df.columns:
+        return Counter()
+    return Counter(df["username"].astype(str).str.casefold())
+
+@st.cache_data(ttl=60)
+def user_contrib_counts():
+    # Per-user entry counts for the stats table and bar chart, derived from
+    # the same Counter that serves the per-user entry metric
+    counts = contribution_counter()
+    if not counts:
+        return pd.DataFrame(columns=["Username", "Entries Count"])
+    return pd.DataFrame(counts.most_common(), columns=["Username", "Entries Count"])
+
+def dup_hash(twi_key, english_key):
+    # Cheap 32-bit fingerprint of a normalized (twi, english) pair
+    return zlib.crc32(f"{twi_key}|{english_key}".encode())
+
+@st.cache_data(ttl=60)
+def load_dataset_duphashes():
+    # Integer prefilter for the dup-key set: probing a set[int] avoids
+    # hashing two strings per candidate; the tuple set is only consulted
+    # on a fingerprint hit to rule out crc collisions
+    return frozenset(dup_hash(t, e) for t, e in load_dataset_dupkeys())
+
+
+def hash_password(password, salt=None):
+    # Salted blake2b digest stored as "<salt-hex>$<digest-hex>"
+    if salt is None:
+        salt = os.urandom(16)
+    digest = hashlib.blake2b(password.encode(), salt=salt, digest_size=16).hexdigest()
+    return f"{salt.hex()}${digest}"
+
+_HASH_SHAPE = re.compile(r"^[0-9a-f]{32}\$[0-9a-f]{32}$")
+
+def verify_password(stored, password):
+    stored = str(stored)
+    # Only treat the stored value as salt$digest when it has exactly the
+    # shape hash_password emits — a legacy plaintext password may itself
+    # contain "$" and must not be misparsed into the hash branch
+    if _HASH_SHAPE.match(stored):
+        salt = bytes.fromhex(stored.split("$", 1)[0])
+        candidate = hash_password(password, salt)
+    else:
+        # Rows created before hashing landed still hold the plaintext
+        # password
+        candidate = password
+    # Compare bytes: compare_digest rejects non-ASCII str, and Twi
+    # passwords can legitimately contain ɛ/ɔ
+    return hmac.compare_digest(stored.encode(), candidate.encode())
+
+
+def warm_admin_caches():
+    # The users and dataset sheets are separate spreadsheet files, so one
+    # values.batchGet cannot cover both; overlap the two reads instead.
+    # On a warm cache both submits return immediately.
+    with ThreadPoolExecutor(max_workers=2) as pool:
+        users_future = pool.submit(load_users_df)
+        dataset_future = pool.submit(load_dataset)
+        users_future.result()
+        dataset_future.result()
+
+
+def invalidate_users_cache():
+    # Clear only the users-derived caches after a users-sheet mutation
+    users_mtime.clear()
+    _users_values.clear()
+    load_users_df.clear()
+    load_user_index.clear()
+    user_name_list.clear()
+
+def invalidate_dataset_cache():
+    # Clear only the dataset-derived caches after a dataset-sheet mutation
+    dataset_mtime.clear()
+    _dataset_values.clear()
+    load_dataset.clear()
+    load_dataset_dupkeys.clear()
+    load_dataset_duphashes.clear()
+    contributor_list.clear()
+    contribution_counter.clear()
+    user_contrib_counts.clear()
+
+
+def display_dataframe_quickly(df, max_rows=500, key=None):
+    # Send at most max_rows over the websocket; long tables get a slider
+    # to page through the rest instead of shipping everything per rerun
+    n_rows = len(df)
+    if n_rows <= max_rows:
+        st.dataframe(df)
+        return
+    start_row = st.slider("Start row", 0, n_rows - max_rows, key=key)
+    end_row = start_row + max_rows
+    st.dataframe(df.iloc[start_row:end_row])
+    st.text(f"Displaying rows {start_row} to {end_row - 1} of {n_rows}.")
+
+
+def coalesce_rows(rows):
+    # Merge sorted 1-based row indices into inclusive (start, end) runs,
+    # e.g. [2, 3, 4, 7] -> [[2, 4], [7, 7]]
+    ranges = []
+    for r in rows:
+        if ranges and ranges[-1][1] == r - 1:
+            ranges[-1][1] = r
+        else:
+            ranges.append([r, r])
+    return ranges
+
+
+# -----------------------------
+# Entry-form fragments (typing in a form only reruns its fragment,
+# not the whole script)
+# -----------------------------
+@st.fragment
+def manual_entry_fragment():
+    with st.form("data_form", clear_on_submit=True):
+        select_date = st.date_input("Date", date.today())
+        twi = st.text_area("Enter Twi Sentence (10–15 words preferred)", height=100, placeholder="Type the Twi sentence here...")
+        english = st.text_area("Enter English Translation", height=100, placeholder="Type the English translation here...")
+
+        submitted = st.form_submit_button("Submit Data", use_container_width=True)
+        if submitted:
+            if not twi.strip() or not english.strip():
+                st.error("❌ Please fill in both fields!")
+            else:
+                key = (twi.strip().casefold(), english.strip().casefold())
+                if dup_hash(*key) in load_dataset_duphashes() and key in load_dataset_dupkeys():
+                    st.warning("⚠️ This translation pair already exists in the dataset.")
+                else:
+                    sheet_write(
+                        client2.append_rows,
+                        [[
+                            select_date.strftime("%Y-%m-%d"),
+                            twi.strip(),
+                            english.strip(),
+                            st.session_state.username
+                        ]],
+                        value_input_option="RAW",
+                        insert_data_option="INSERT_ROWS",
+                        table_range="A1",
+                    )
+                    invalidate_dataset_cache()  # 🔄 refresh dataset caches after mutation
+                    # 🔹 No full rerun: bump the counter in place and show it here;
+                    # the page header catches up on the next natural rerun
+                    st.session_state.entry_count = st.session_state.get("entry_count", 0) + 1
+                    st.success("✅ Entry submitted successfully!")
+                    st.metric("Your Total Entries", st.session_state.entry_count)
+                    st.balloons()
+
+@st.fragment
+def excel_upload_fragment():
+    st.session_state.uploaded_excel = st.file_uploader("Upload Excel File (.xlsx)", type=["xlsx"])  # 🔹 track file
+    if st.session_state.uploaded_excel:
+        try:
+            # 🔹 Only parse the first two columns (twi, english) as strings —
+            # skips type inference and the rest of the workbook
+            excel_df = pd.read_excel(
+                st.session_state.uploaded_excel,
+                engine="openpyxl",
+                usecols=[0, 1],
+                names=["twi", "english"],
+                dtype=str,
+                header=0,
+            ).dropna(how="all")
+
+            if excel_df.shape[1] < 2:
+                st.error("❌ Excel file must contain at least two columns (Twi and English).")
+            else:
+                st.write("✅ Preview of uploaded file (first two columns as Twi & English):")
+                st.dataframe(excel_df.head())
+
+                if st.button("Insert All Rows into Google Sheet"):
+                    today_str = date.today().strftime("%Y-%m-%d")
+
+                    # 🔹 Vectorized dedup: normalize, drop blanks and in-file
+                    # duplicates, then anti-join against the cached key set
+                    # fillna first: astype(str) would turn empty cells into
+                    # the literal string "nan", which the blank filter (and
+                    # the dataset) must never see
+                    keys = excel_df.assign(
+                        twi=excel_df["twi"].fillna("").astype(str).str.strip(),
+                        english=excel_df["english"].fillna("").astype(str).str.strip(),
+                    )
+                    keys = keys[(keys["twi"] != "") & (keys["english"] != "")]
+                    keys = keys.assign(
+                        twi_key=keys["twi"].str.casefold(),
+                        english_key=keys["english"].str.casefold(),
+                    ).drop_duplicates(subset=["twi_key", "english_key"])
+
+                    existing_df = pd.DataFrame(
+                        list(load_dataset_dupkeys()), columns=["twi_key", "english_key"]
+                    )
+                    merged = keys.merge(existing_df, on=["twi_key", "english_key"], how="left", indicator=True)
+                    new_rows = merged[merged["_merge"] == "left_only"]
+                    duplicates_skipped = len(excel_df) - len(new_rows)
+
+                    new_rows = new_rows.assign(date=today_str, username=st.session_state.username)
+                    rows_to_add = new_rows[["date", "twi", "english", "username"]].to_numpy().tolist()
+
+                    if rows_to_add:
+                        # 🔹 One request per 500-row slice; small uploads stay
+                        # a single call, huge ones avoid oversized payloads
+                        for i in range(0, len(rows_to_add), UPLOAD_CHUNK_ROWS):
+                            sheet_write(
+                                client2.append_rows,
+                                rows_to_add[i:i + UPLOAD_CHUNK_ROWS],
+                                value_input_option="RAW",
+                                insert_data_option="INSERT_ROWS",
+                                table_range="A1",
+                            )
+                        invalidate_dataset_cache()  # 🔄 refresh dataset caches after mutation
+                        st.session_state.uploaded_excel = None  # 🔹 clear file so preview disappears
+                        st.success(f"🎉 Inserted {len(rows_to_add)} new rows! 🚫 Skipped {duplicates_skipped} duplicates.")
+                        st.rerun()
+                    else:
+                        st.warning("⚠️The entries already exist.")
+        except Exception as e:
+            st.error(f"❌ Error reading Excel file: {e}")
+
+
+# -----------------------------
+# Admin dashboard fragments (each section reruns on its own)
+# -----------------------------
+@st.fragment
+def admin_tables_fragment():
+    # Gate each table behind a toggle so the read only happens for
+    # sections the admin actually opens
+    st.subheader("📖 Twi-English Dataset")
+    if st.toggle("Show dataset table", key="show_dataset"):
+        display_dataframe_quickly(load_dataset(), key="dataset_start_row")
+
+    st.subheader("👥 All Users")
+    if st.toggle("Show users table", key="show_users"):
+        display_dataframe_quickly(load_users_df(), key="users_start_row")
+
+@st.fragment
+def admin_stats_fragment():
+    df = load_dataset()
+    dff = load_users_df()
+
+    st.subheader("📊 Dataset Statistics")
+    total_entries = len(df)
+    total_users = len(dff)
+
+    col1, col2, col3 = st.columns(3)
+    col1.metric("Total Entries", total_entries)
+    col2.metric("Total Users", total_users)
+    col3.metric("Avg Entries/User", f"{total_entries / max(total_users-1,1):.1f}")
+
+    username_counts = user_contrib_counts()
+    if not username_counts.empty:
+        st.subheader("📌 User Contributions")
+        st.dataframe(username_counts)
+        st.bar_chart(username_counts.set_index("Username"))
+
+@st.fragment
+def manage_users_fragment():
+    st.subheader("🗑️ Manage Users")
+    dff = load_users_df()
+    if not dff.empty and "username" in dff.columns:
+        user_to_delete = st.selectbox("Select user to delete", options=user_name_list())
+        col_user, col_both = st.columns(2)
+        delete_user = col_user.button("Delete User")
+        delete_both = col_both.button("Delete User & Contributions")
+        if delete_user or delete_both:
+            # 🔹 Row index from the cached grid — no lookup round-trip at all
+            row = users_row_for(user_to_delete)
+            if row:
+                # 🔹 Tombstone write instead of a structural row delete
+                sheet_write(
+                    client1.batch_update,
+                    tombstone_updates([row], USERS_DELETED_COL),
+                    value_input_option="RAW",
+                )
+                invalidate_users_cache()  # 🔄 refresh users caches after mutation
+                if delete_both:
+                    # 🔹 Users and dataset are separate spreadsheet files, so the
+                    # two tombstone writes cannot share one batchUpdate — but each
+                    # side is a single batched call, two HTTP requests total
+                    rows_to_delete = dataset_rows_for(user_to_delete)
+                    if rows_to_delete:
+                        sheet_write(
+                            client2.batch_update,
+                            tombstone_updates(rows_to_delete, DATASET_DELETED_COL),
+                            value_input_option="RAW",
+                        )
+                    invalidate_dataset_cache()  # 🔄 refresh dataset caches after mutation
+                    st.success(f"Deleted user '{user_to_delete}' and their contributions")
+                else:
+                    st.success(f"Deleted user '{user_to_delete}'")
+                st.rerun()
+
+@st.fragment
+def manage_contributions_fragment():
+    st.subheader("🗑️ Manage Contributions")
+    df = load_dataset()
+    if not df.empty and "username" in df.columns:
+        contrib_user = st.selectbox("Select user to delete contributions", options=contributor_list())
+        if st.button("Delete Contributions"):
+            # 🔹 Row indices from the cached grid — no lookup round-trip at all
+            rows_to_delete = dataset_rows_for(contrib_user)
+            if rows_to_delete:
+                # 🔹 Tombstone writes: one values batch_update flags every row,
+                # with contiguous runs collapsed into single range writes
+                sheet_write(
+                    client2.batch_update,
+                    tombstone_updates(rows_to_delete, DATASET_DELETED_COL),
+                    value_input_option="RAW",
+                )
+            invalidate_dataset_cache()  # 🔄 refresh dataset caches after mutation
+            st.success(f"All contributions from '{contrib_user}' deleted")
+            st.rerun()
+
+
+# Session state
+SESSION_DEFAULTS = {
+    "logged_in": False,
+    "username": "",
+    "is_admin": False,
+    "uploaded_excel": None,   # 🔹 track uploaded excel
+}
+for key, value in SESSION_DEFAULTS.items():
+    st.session_state.setdefault(key, value)
+
+st.title("📖 Twi Dataset Hub")
+
+# ----------------- ADMIN DASHBOARD -----------------
+def render_admin():
+    st.header("🛠️ Admin Dashboard")
+
+    if st.button("Logout"):
+        st.session_state.logged_in = False
+        st.session_state.username = ""
+        st.session_state.is_admin = False
+        st.rerun()
+
+    warm_admin_caches()
+    stale_data_warning()
+
+    admin_tables_fragment()
+    admin_stats_fragment()
+    manage_users_fragment()
+    manage_contributions_fragment()
+
+# ----------------- USER DASHBOARD -----------------
+def render_user():
+    # 🔹 Current user's entry count from the cached counter — no
+    # DataFrame filtering per rerun
+    entry_count = contribution_counter().get(st.session_state.username.casefold(), 0)
+    st.session_state.entry_count = entry_count
+    stale_data_warning()
+
+    # Header with stats + logout on SAME LINE
+    col1, col2 = st.columns([3,1])
+    with col1:
+        st.subheader(f"👋 Welcome, {st.session_state.username} 🤗 | Entries = {entry_count}")
+    with col2:
+        if st.button("Logout"):
+            st.session_state.logged_in = False
+            st.session_state.username = ""
+            st.session_state.is_admin = False
+            st.rerun()
+
+    # Tabs for entry methods
+    st.subheader("📝 Data Collection Form")
+    tab_manual, tab_excel = st.tabs(["✍️ Manual Entry", "📂 Upload Excel"])
+
+    with tab_manual:
+        manual_entry_fragment()
+
+    with tab_excel:
+        excel_upload_fragment()
+
+# ----------------- LOGIN / REGISTER -----------------
+def render_login():
+    tab1, tab2 = st.tabs(["🔑 Login", "📝 Register"])
+
+    with tab2:
+        st.subheader("Create New Account")
+        with st.form("register_form", clear_on_submit=True):
+            name = st.text_input("Full Name", placeholder="Enter Full Name")
+            username = st.text_input("Username/Nickname", placeholder= "Enter Username/Nickname")
+            password = st.text_input("Password", type="password", placeholder="Enter Password")
+            repassword = st.text_input("Repeat Password", type="password", placeholder="Repeat Password")
+            momo_contact= st.text_input("Payment Phone Number", placeholder= "Enter Phone Number for Cash Transfer")
+            momo_contact_1= st.text_input("Network Provider of Payment Phone Number", placeholder= "Enter the Network provider (Telecel Cash/MoMo/AirtelTigo Cash)")
+            momo_name=st.text_input("Account Name", placeholder= "Enter Account Name of the Payment Phone Number")
+            call_contact= st.text_input("Call Contact", placeholder= "Enter Call Contact")
+            email= st.text_input("Email", placeholder= "Enter Email")
+
+            if st.form_submit_button("Register"):
+                if not name or not username or not password:
+                    st.error("❌ Please fill all fields")
+                elif password != repassword:
+                    st.error("❌ Passwords do not match")
+                elif len(password) < 4:
+                    st.error("❌ Password must be at least 4 characters")
+                elif username.strip().lower() in load_user_index():
+                    st.error("❌ Username already exists")
+                else:
+                    sheet_write(
+                        client1.append_rows,
+                        [[name.strip(), momo_contact.strip(), call_contact.strip(), username.strip(), hash_password(password.strip()), email.strip(), momo_name.strip(), momo_contact_1.strip()]],
+                        value_input_option="RAW",
+                        insert_data_option="INSERT_ROWS",
+                        table_range="A1",
+                    )
+                    invalidate_users_cache()  # 🔄 refresh users caches after mutation
+                    st.success("🎉 Registration successful! Please login.")
+
+    with tab1:
+        st.subheader("Login to Your Account")
+        with st.form("login_form"):
+            username_in = st.text_input("Username/Nickname", placeholder="Enter Username/Nickname")
+            password_in = st.text_input("Password", type="password", placeholder="Enter Password")
+
+            if st.form_submit_button("Login"):
+                username_in = username_in.strip().lower()
+                password_in = password_in.strip()
+
+                if not username_in or not password_in:
+                    st.error("❌ Enter both username and password")
+                elif username_in == "admin" and password_in == "1345":
+                    st.session_state.logged_in = True
+                    st.session_state.username = "admin"
+                    st.session_state.is_admin = True
+                    st.rerun()
+                else:
+                    user = load_user_index().get(username_in)
+                    if user and verify_password(user.get("password",""), password_in):
+                        st.session_state.logged_in = True
+                        st.session_state.username = str(user.get("username",""))
+                        st.session_state.is_admin = False
+                        st.rerun()
+                    else:
+                        st.error("❌ Wrong login details")
+
+
+if st.session_state.logged_in and st.session_state.is_admin:
+    render_admin()
+elif st.session_state.logged_in and not st.session_state.is_admin:
+    render_user()
+else:
+    render_login()
+
+
+
+
+